@@ -73,14 +73,14 @@ class Library:
         return libraryViews
 
     @staticmethod
-    def GetItem(embyServer, itemId):
+    def GetItem(embyServer, itemId, timeout=None):
         if not embyServer:
             raise ValueError('invalid embyServer')
         if not itemId:
             raise ValueError('invalid itemId')
 
         itemUrl = embyServer.BuildUserItemUrl(itemId)
-        return embyServer.ApiGet(itemUrl)
+        return embyServer.ApiGet(itemUrl, timeout=timeout)
 
     @staticmethod
     def RefreshItemMetadata(embyServer, itemId):
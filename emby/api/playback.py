@@ -10,6 +10,8 @@ from uuid import uuid4
 
 
 class PlaybackCheckin:
+    REQUEST_TIMEOUT_S = 5
+
     @staticmethod
     def GenerateSessionId():
         return str(uuid4()).replace("-", "")
@@ -20,7 +22,7 @@ class PlaybackCheckin:
             raise ValueError('invalid embyServer')
 
         url = embyServer.BuildSessionsPlayingUrl()
-        embyServer.ApiPost(url, json=data)
+        embyServer.ApiPost(url, json=data, timeout=PlaybackCheckin.REQUEST_TIMEOUT_S)
 
     @staticmethod
     def PlaybackProgress(embyServer, data):
@@ -28,7 +30,7 @@ class PlaybackCheckin:
             raise ValueError('invalid embyServer')
 
         url = embyServer.BuildSessionsPlayingProgressUrl()
-        embyServer.ApiPost(url, json=data)
+        embyServer.ApiPost(url, json=data, timeout=PlaybackCheckin.REQUEST_TIMEOUT_S)
 
     @staticmethod
     def StopPlayback(embyServer, data):
@@ -36,4 +38,4 @@ class PlaybackCheckin:
             raise ValueError('invalid embyServer')
 
         url = embyServer.BuildSessionsPlayingStoppedUrl()
-        embyServer.ApiPost(url, json=data)
+        embyServer.ApiPost(url, json=data, timeout=PlaybackCheckin.REQUEST_TIMEOUT_S)
@@ -6,9 +6,13 @@
 #  See LICENSES/README.md for more information.
 #
 
+from collections import namedtuple
+import sys
 import threading
 import time
 
+from six.moves import queue
+
 import xbmc  # pylint: disable=import-error
 
 from emby.api.library import Library
@@ -19,333 +23,619 @@ from emby.server import Server
 from lib import kodi
 from lib.utils import log, mediaProvider2str
 
+NANOSECONDS_PER_SECOND = 1000000000
+# deadline of the next progress report while nothing is being played (which is never reached)
+_NO_PROGRESS_REPORT_NS = sys.maxsize
+
+# minimum time (in seconds) between two reported seeks
+SEEK_REPORT_MIN_GAP = 0.5
+# time (in seconds) for which a media provider's external subtitles setting is cached
+EXTERNAL_SUBTITLES_SETTING_CACHE_TIME = 60
+# maximum time (in seconds) to wait for a free spot in the playback report queue before dropping a report
+REPORT_QUEUE_TIMEOUT = 1
+# maximum time (in seconds) to wait for the pending playback reports to be sent when stopping
+REPORT_THREAD_STOP_TIMEOUT = 5
+# maximum time (in seconds) to wait for the Emby server to provide an item's external subtitles
+EXTERNAL_SUBTITLES_REQUEST_TIMEOUT = 10
+
+# prefix of subtitle delivery URLs which can be streamed directly
+_VIDEO_URL_PREFIX = '/' + constants.URL_VIDEOS
+
+# state of the currently playing item which is replaced as a whole instead of resetting every single property
+_PlaybackState = namedtuple('_PlaybackState', [
+    'file',
+    'item',
+    'itemId',
+    'mediaProvider',
+    'mediaProviderStr',
+    'server',
+    'playSessionId',
+    'paused',
+    'playMethod',
+    'lastPlaybackPosition',
+    'runTimeTicks',
+    'pendingSeekReport',
+    'externalSubtitlesCancelled',
+])
+_EMPTY_PLAYBACK_STATE = _PlaybackState(file=None, item=None, itemId=None, mediaProvider=None, mediaProviderStr=None,
+                                       server=None, playSessionId=None, paused=False, playMethod=None,
+                                       lastPlaybackPosition=None, runTimeTicks=None, pendingSeekReport=False,
+                                       externalSubtitlesCancelled=None)
+
+# playback reports are sent to the Emby server by a separate thread to not block Kodi's player callbacks
+_reportQueue = queue.Queue(maxsize=4)
+_reportThread = None
+
+
+def _sendReports():
+    while True:
+        entry = _reportQueue.get()
+        # None is queued by _stopReports() after the last report
+        if entry is None:
+            return
+
+        report, args = entry
+        try:
+            report(*args)
+        except Exception as err:  # pylint: disable=broad-except
+            Player.log('failed to send playback report: {}', err, level=xbmc.LOGWARNING)
+
+
+def _queueReport(report, *args, discardable=False):
+    global _reportThread  # pylint: disable=global-statement
+    if not _reportThread or not _reportThread.is_alive():
+        _reportThread = threading.Thread(target=_sendReports, name='Emby playback reports')
+        _reportThread.daemon = True
+        _reportThread.start()
+
+    # discardable reports are dropped right away if the Emby server can't keep up with the reports already queued
+    # while all other reports are only dropped if the Emby server doesn't respond at all to not block the caller
+    try:
+        if discardable:
+            _reportQueue.put_nowait((report, args))
+        else:
+            _reportQueue.put((report, args), timeout=REPORT_QUEUE_TIMEOUT)
+    except queue.Full:
+        if not discardable:
+            Player.log('dropping playback report {} because the Emby server doesn\'t respond to previous reports',
+                       report.__name__, level=xbmc.LOGWARNING)
+        return False
+
+    return True
+
 
+def _stopReports():
+    global _reportThread  # pylint: disable=global-statement
+    if not _reportThread or not _reportThread.is_alive():
+        return
+
+    # let the thread send all reports queued so far before it stops
+    try:
+        _reportQueue.put(None, timeout=REPORT_THREAD_STOP_TIMEOUT)
+        _reportThread.join(REPORT_THREAD_STOP_TIMEOUT)
+    except queue.Full:
+        pass
+
+    if _reportThread.is_alive():
+        Player.log('failed to send all pending playback reports', level=xbmc.LOGWARNING)
+
+    _reportThread = None
+
+
+# Kodi invokes the xbmc.Player callbacks (onPlayBackStarted() etc.) on the thread running the observer loop, i.e.
+# the same thread which calls Process(). Therefore the playback state must only be accessed from that thread and
+# doesn't need to be protected by a lock. Only the known media providers are accessed from other threads (through
+# AddProvider() / RemoveProvider()) and are replaced (instead of modified) under self._providersLock (as are the
+# cached external subtitles settings of the media providers).
+# External subtitles are looked up on a separate thread which only works on a copy of the playback state and its own
+# connection to the Emby server and is told through the copy's externalSubtitlesCancelled event when to give up.
 # pylint: disable=too-many-instance-attributes
 class Player(xbmc.Player):
-    def __init__(self, progressInterval=None):
+    # avoid the per-instance __dict__ for the attributes accessed on every callback
+    __slots__ = (
+        '_providersLock',
+        '_progressInterval',
+        '_maxProgressInterval',
+        '_currentProgressInterval',
+        '_lastProgressReport',
+        '_nextProgressReportNs',
+        '_lastSeekReport',
+        '_providers',
+        '_providerStrs',
+        '_externalSubtitlesSettings',
+        '_state',
+    )
+
+    _minLogLevel = xbmc.LOGDEBUG
+
+    def __init__(self, progressInterval=None, maxProgressInterval=None):
         super(xbmc.Player, self).__init__()
 
-        self._lock = threading.Lock()
+        self._providersLock = threading.Lock()
+
+        Player._updateMinLogLevel()
 
         self._progressInterval = progressInterval or 10
+        self._maxProgressInterval = max(maxProgressInterval or 60, self._progressInterval)
+        self._currentProgressInterval = self._progressInterval
         self._lastProgressReport = None
+        self._nextProgressReportNs = _NO_PROGRESS_REPORT_NS
+        self._lastSeekReport = 0.0
 
         self._providers = {}
+        self._providerStrs = {}
+        self._externalSubtitlesSettings = {}
 
-        self._file = None
-        self._item = None
-        self._itemId = None
-        self._mediaProvider = None
-        self._server = None
-        self._playSessionId = None
-        self._paused = False
-        self._playMethod = None
-        self._lastPlaybackPosition = None
+        self._state = _EMPTY_PLAYBACK_STATE
+
+    def Stop(self):
+        # report the end of a playback which is still in progress
+        self._stopPlayback()
+
+        _stopReports()
 
     def AddProvider(self, mediaProvider):
         if not mediaProvider:
             raise ValueError('invalid mediaProvider')
 
-        with self._lock:
-            if not mediaProvider.getIdentifier() in self._providers:
-                Player.log('{} added'.format(mediaProvider2str(mediaProvider)))
-            self._providers[mediaProvider.getIdentifier()] = mediaProvider
+        mediaProviderId = mediaProvider.getIdentifier()
+        # always format the media provider again to pick up any changes (e.g. a renamed media provider)
+        mediaProviderStr = mediaProvider2str(mediaProvider)
+
+        # replace the providers instead of modifying them so that they can be read without locking
+        # (the string representation is added first so that it's available for every known provider)
+        with self._providersLock:
+            providerStrs = dict(self._providerStrs)
+            providerStrs[mediaProviderId] = mediaProviderStr
+            self._providerStrs = providerStrs
+
+            providers = dict(self._providers)
+            if mediaProviderId not in providers:
+                Player.log('{} added', mediaProviderStr)
+            providers[mediaProviderId] = mediaProvider
+            self._providers = providers
+
+            self._invalidateExternalSubtitlesSetting(mediaProviderId)
 
     def RemoveProvider(self, mediaProvider):
         if not mediaProvider:
             raise ValueError('invalid mediaProvider')
 
-        with self._lock:
-            if mediaProvider.getIdentifier() in self._providers:
-                Player.log('{} removed'.format(mediaProvider2str(mediaProvider)))
-            del self._providers[mediaProvider.getIdentifier()]
+        mediaProviderId = mediaProvider.getIdentifier()
+
+        with self._providersLock:
+            providers = dict(self._providers)
+            if mediaProviderId in providers:
+                Player.log('{} removed', self._providerStrs.get(mediaProviderId))
+            del providers[mediaProviderId]
+            self._providers = providers
+
+            providerStrs = dict(self._providerStrs)
+            providerStrs.pop(mediaProviderId, None)
+            self._providerStrs = providerStrs
+
+            self._invalidateExternalSubtitlesSetting(mediaProviderId)
 
     def Process(self):
-        with self._lock:
-            if not self._lastProgressReport:
-                return
+        # adhere to the configured progress interval (nothing is scheduled while nothing is being played)
+        if time.monotonic_ns() < self._nextProgressReportNs:
+            return
 
-            # adhere to the configured progress interval
-            if (time.time() - self._lastProgressReport) < self._progressInterval:
-                return
+        if self._state.pendingSeekReport:
+            # report the position of the last of a series of coalesced seeks
+            self._state = self._state._replace(pendingSeekReport=False)
+            if self._reportPlaybackProgress():
+                self._lastSeekReport = self._lastProgressReport
+                Player.log('playback seek for "{}" ({}) on {} reported',
+                           self._state.item.getLabel, self._state.file, self._state.mediaProviderStr)
+            return
+
+        if self._state.paused:
+            # while paused the playback position doesn't change but the Emby server still needs to be told that the
+            # playback session is alive (the pause itself has already been reported by onPlayBackPaused())
+            self._currentProgressInterval = self._maxProgressInterval
+        else:
+            # during steady playback gradually increase the interval between progress reports
+            self._currentProgressInterval = min(self._currentProgressInterval * 2, self._maxProgressInterval)
 
-            self._reportPlaybackProgress()
+        # only these periodic reports can be skipped because the next one will report the current position anyway
+        self._reportPlaybackProgress(discardable=True)
 
     def onPlayBackStarted(self):
-        with self._lock:
-            self._reset()
-            try:
-                self._file = self.getPlayingFile()
-            except RuntimeError:
-                pass
+        # close the session of a previous playback (e.g. when advancing in a playlist)
+        self._reset()
+        try:
+            self._state = self._state._replace(file=self.getPlayingFile())
+        except RuntimeError:
+            pass
 
     def onAVStarted(self):
-        with self._lock:
-            self._startPlayback()
+        self._startPlayback()
 
     def onPlayBackSeek(self, seekTime, seekOffset):  # pylint: disable=unused-argument
-        with self._lock:
-            if self._reportPlaybackProgress():
-                Player.log('playback seek for "{}" ({}) on {} reported'
-                           .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)))
+        self._reportPlaybackSeek('playback seek')
 
     def onPlayBackSeekChapter(self, chapter):  # pylint: disable=unused-argument
-        with self._lock:
-            if self._reportPlaybackProgress():
-                Player.log('playback seek chapter for "{}" ({}) on {} reported'
-                           .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)))
+        self._reportPlaybackSeek('playback seek chapter')
 
     def onPlayBackPaused(self):
-        with self._lock:
-            self._paused = True
-            if self._reportPlaybackProgress():
-                Player.log('playback paused for "{}" ({}) on {} reported'
-                           .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)))
+        self._state = self._state._replace(paused=True)
+        self._currentProgressInterval = self._maxProgressInterval
+        if self._reportPlaybackProgress():
+            Player.log('playback paused for "{}" ({}) on {} reported',
+                       self._state.item.getLabel, self._state.file, self._state.mediaProviderStr)
 
     def onPlayBackResumed(self):
-        with self._lock:
-            self._paused = False
-            if self._reportPlaybackProgress():
-                Player.log('playback resumed for "{}" ({}) on {} reported'
-                           .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)))
+        self._state = self._state._replace(paused=False)
+        self._currentProgressInterval = self._progressInterval
+        if self._reportPlaybackProgress():
+            Player.log('playback resumed for "{}" ({}) on {} reported',
+                       self._state.item.getLabel, self._state.file, self._state.mediaProviderStr)
 
     def onPlayBackStopped(self):
-        with self._lock:
-            self._stopPlayback()
+        self._stopPlayback()
 
     def onPlayBackEnded(self):
-        with self._lock:
-            self._stopPlayback()
+        self._stopPlayback()
 
     def onPlayBackError(self):
-        with self._lock:
-            self._stopPlayback(failed=True)
+        self._stopPlayback(failed=True)
 
     def _reset(self):
-        self._file = None
-        self._item = None
-        self._itemId = None
-        self._mediaProvider = None
-        self._server = None
-        self._playSessionId = None
-        self._paused = False
-        self._playMethod = None
-        self._lastPlaybackPosition = None
-
-    # pylint: disable=too-many-return-statements, too-many-branches
+        # close the session once all reports to the Emby server have been sent
+        if self._state.server:
+            _queueReport(self._state.server.CloseSession)
+
+        # don't add any external subtitles to whatever is played next
+        if self._state.externalSubtitlesCancelled:
+            self._state.externalSubtitlesCancelled.set()
+
+        self._state = _EMPTY_PLAYBACK_STATE
+
+        # don't process any progress reports until the next playback start schedules them again
+        self._lastProgressReport = None
+        self._nextProgressReportNs = _NO_PROGRESS_REPORT_NS
+
+    # pylint: disable=too-many-return-statements, too-many-branches, too-many-locals, too-many-statements
     def _startPlayback(self):
-        if not self._file:
+        # pick up changes to the debug logging setting
+        Player._updateMinLogLevel()
+
+        playingFile = self._state.file
+        if not playingFile:
             self._reset()
             return
 
+        # only video playback is reported to the Emby server
         if not self.isPlayingVideo():
             self._reset()
             return
 
-        self._item = self.getPlayingItem()
-        if not self._item:
+        item = self.getPlayingItem()
+        if not item:
             self._reset()
             return
+        label = item.getLabel()
 
         # check if the item has been imported from a media provider
-        mediaProviderId = self._item.getMediaProviderId()
+        mediaProviderId = item.getMediaProviderId()
         if not mediaProviderId:
             self._reset()
             return
 
-        if mediaProviderId not in self._providers:
-            Player.log('currently playing item {} ({}) has been imported from an unknown media provider {}'
-                       .format(self._item.getLabel(), self._file, mediaProviderId), xbmc.LOGWARNING)
+        mediaProvider = self._providers.get(mediaProviderId)
+        if not mediaProvider:
+            Player.log('currently playing item {} ({}) has been imported from an unknown media provider {}',
+                       label, playingFile, mediaProviderId, level=xbmc.LOGWARNING)
             self._reset()
             return
-        self._mediaProvider = self._providers[mediaProviderId]
+        mediaProviderStr = self._providerStrs.get(mediaProviderId)
 
-        videoInfoTag = self.getVideoInfoTag()
+        # retrieve the video info tag from the already retrieved item if possible
+        try:
+            videoInfoTag = item.getVideoInfoTag()
+        except AttributeError:
+            videoInfoTag = self.getVideoInfoTag()
         if not videoInfoTag:
             self._reset()
             return
 
-        self._itemId = kodi.Api.getEmbyItemIdFromVideoInfoTag(videoInfoTag)
-        if not self._itemId:
+        itemId = kodi.Api.getEmbyItemIdFromVideoInfoTag(videoInfoTag)
+        if not itemId:
             self._reset()
             return
 
-        settings = self._mediaProvider.prepareSettings()
-        if not settings:
-            Player.log('failed to load settings for {} ({}) playing from {}'
-                       .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)),
-                       xbmc.LOGWARNING)
+        enableExternalSubtitles = self._wantsExternalSubtitles(mediaProvider)
+        if enableExternalSubtitles is None:
+            Player.log('failed to load settings for {} ({}) playing from {}',
+                       label, playingFile, mediaProviderStr, level=xbmc.LOGWARNING)
             self._reset()
             return
 
         # determine the play method
-        if Server.IsDirectStreamUrl(self._mediaProvider, self._file):
-            self._playMethod = constants.PLAYING_PLAY_METHOD_DIRECT_STREAM
+        if Server.IsDirectStreamUrl(mediaProvider, playingFile):
+            playMethod = constants.PLAYING_PLAY_METHOD_DIRECT_STREAM
         else:
-            self._playMethod = constants.PLAYING_PLAY_METHOD_DIRECT_PLAY
+            playMethod = constants.PLAYING_PLAY_METHOD_DIRECT_PLAY
 
         # setup and authenticate with the Emby server
+        server = None
         try:
-            self._server = Server(self._mediaProvider)
+            server = Server(mediaProvider)
         except ValueError as err:
-            Player.log('failed to setup connection to media provider {}: {}'
-                       .format(mediaProvider2str(self._mediaProvider), err))
+            Player.log('failed to setup connection to media provider {}: {}', mediaProviderStr, err)
 
-        if not self._server or not self._server.Authenticate(force=True):
-            Player.log('cannot connect to media provider {} to report playback progress of "{}" ({})'
-                       .format(mediaProvider2str(self._mediaProvider), self._item.getLabel(), self._file),
-                       xbmc.LOGWARNING)
+        if not server or not server.Authenticate(force=True):
+            Player.log('cannot connect to media provider {} to report playback progress of "{}" ({})',
+                       mediaProviderStr, label, playingFile, level=xbmc.LOGWARNING)
             self._reset()
             return
 
-        # when using DirectStream add any external subtitles
-        if self._playMethod == constants.PLAYING_PLAY_METHOD_DIRECT_STREAM and \
-           settings.getBool(constants.SETTING_PROVIDER_PLAYBACK_ENABLE_EXTERNAL_SUBTITLES):
-            self._addExternalSubtitles()
+        # reuse the same connection(s) for all reports during playback
+        server.EnsureSession()
+
+        # the total time doesn't change during playback so only retrieve it once
+        try:
+            runTimeTicks = kodi.Api.secondsToTicks(self.getTotalTime())
+        except RuntimeError:
+            runTimeTicks = None
 
         # generate a session identifier
-        self._playSessionId = PlaybackCheckin.GenerateSessionId()
+        playSessionId = PlaybackCheckin.GenerateSessionId()
+
+        self._state = _PlaybackState(file=playingFile, item=item, itemId=itemId, mediaProvider=mediaProvider,
+                                     mediaProviderStr=mediaProviderStr, server=server, playSessionId=playSessionId,
+                                     paused=False, playMethod=playMethod, lastPlaybackPosition=None,
+                                     runTimeTicks=runTimeTicks, pendingSeekReport=False,
+                                     externalSubtitlesCancelled=None)
+
+        # when using DirectStream add any external subtitles (without delaying the playback start report)
+        if playMethod == constants.PLAYING_PLAY_METHOD_DIRECT_STREAM and enableExternalSubtitles:
+            self._startExternalSubtitlesLookup()
 
         # prepare the data of the API call
         data = self._preparePlayingData(stopped=False)
 
         # tell the Emby server that a library item is being played
-        PlaybackCheckin.StartPlayback(self._server, data)
+        reported = _queueReport(PlaybackCheckin.StartPlayback, server, data)
 
-        self._lastProgressReport = time.time()
+        self._currentProgressInterval = self._progressInterval
+        self._scheduleProgressReport()
 
-        Player.log('playback start for "{}" ({}) on {} reported'
-                   .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)))
+        if reported:
+            Player.log('playback start for "{}" ({}) on {} reported', label, playingFile, mediaProviderStr)
 
-    def _reportPlaybackProgress(self, event=constants.PLAYING_PROGRESS_EVENT_TIME_UPDATE):
+    def _startExternalSubtitlesLookup(self):
+        # use a separate connection to not interfere with the playback reports sent over the session
+        try:
+            server = Server(self._state.mediaProvider)
+        except ValueError as err:
+            Player.log('failed to setup connection to media provider {}: {}', self._state.mediaProviderStr, err)
+            return
+
+        self._state = self._state._replace(externalSubtitlesCancelled=threading.Event())
+
+        subtitlesThread = threading.Thread(target=self._addExternalSubtitles, args=(self._state, server),
+                                           name='Emby external subtitles')
+        subtitlesThread.daemon = True
+        subtitlesThread.start()
+
+    def _wantsExternalSubtitles(self, mediaProvider):
+        # avoid loading the media provider's settings on every playback start
+        mediaProviderId = mediaProvider.getIdentifier()
+        cached = self._externalSubtitlesSettings.get(mediaProviderId)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+
+        # the media providers are replaced whenever one is (re-)registered or removed
+        providers = self._providers
+
+        settings = mediaProvider.prepareSettings()
+        if not settings:
+            return None
+
+        enableExternalSubtitles = settings.getBool(constants.SETTING_PROVIDER_PLAYBACK_ENABLE_EXTERNAL_SUBTITLES)
+
+        # don't cache the setting if it might have been loaded from a media provider which has been replaced since
+        with self._providersLock:
+            if self._providers is providers and providers.get(mediaProviderId) is mediaProvider:
+                externalSubtitlesSettings = dict(self._externalSubtitlesSettings)
+                externalSubtitlesSettings[mediaProviderId] = \
+                    (time.monotonic() + EXTERNAL_SUBTITLES_SETTING_CACHE_TIME, enableExternalSubtitles)
+                self._externalSubtitlesSettings = externalSubtitlesSettings
+
+        return enableExternalSubtitles
+
+    # must be called with self._providersLock held
+    def _invalidateExternalSubtitlesSetting(self, mediaProviderId):
+        if mediaProviderId not in self._externalSubtitlesSettings:
+            return
+
+        externalSubtitlesSettings = dict(self._externalSubtitlesSettings)
+        del externalSubtitlesSettings[mediaProviderId]
+        self._externalSubtitlesSettings = externalSubtitlesSettings
+
+    def _reportPlaybackProgress(self, event=constants.PLAYING_PROGRESS_EVENT_TIME_UPDATE, discardable=False):
         if not self.isPlaying():
             self._reset()
-        if not self._item:
+        if not self._state.item:
             return False
 
         data = self._preparePlayingData(stopped=False, event=event)
-        PlaybackCheckin.PlaybackProgress(self._server, data)
+        reported = _queueReport(PlaybackCheckin.PlaybackProgress, self._state.server, data, discardable=discardable)
+        if not reported and discardable:
+            Player.log('discarding playback progress report for "{}" ({}) on {} because previous reports are pending',
+                       self._state.item.getLabel, self._state.file, self._state.mediaProviderStr,
+                       level=xbmc.LOGDEBUG)
+
+        self._scheduleProgressReport()
+
+        return reported
 
-        self._lastProgressReport = time.time()
+    def _reportPlaybackSeek(self, action):
+        if not self._state.item:
+            return
 
-        return True
+        if self._state.paused:
+            self._currentProgressInterval = self._maxProgressInterval
+        else:
+            self._currentProgressInterval = self._progressInterval
+
+        # coalesce seeks in quick succession (e.g. while scrubbing) and let Process() report the last one
+        nowNs = time.monotonic_ns()
+        now = nowNs / NANOSECONDS_PER_SECOND
+        if (now - self._lastSeekReport) < SEEK_REPORT_MIN_GAP:
+            self._state = self._state._replace(pendingSeekReport=True)
+            self._nextProgressReportNs = nowNs + int(SEEK_REPORT_MIN_GAP * NANOSECONDS_PER_SECOND)
+            return
+
+        if self._reportPlaybackProgress():
+            self._lastSeekReport = now
+            Player.log('{} for "{}" ({}) on {} reported',
+                       action, self._state.item.getLabel, self._state.file, self._state.mediaProviderStr)
+
+    def _scheduleProgressReport(self):
+        nowNs = time.monotonic_ns()
+        self._lastProgressReport = nowNs / NANOSECONDS_PER_SECOND
+        self._nextProgressReportNs = nowNs + int(self._currentProgressInterval * NANOSECONDS_PER_SECOND)
 
     def _stopPlayback(self, failed=False):
-        if not self._item:
+        if not self._state.item:
             return
 
         data = self._preparePlayingData(stopped=True, failed=failed)
-        PlaybackCheckin.StopPlayback(self._server, data)
-
-        Player.log('playback stopped for "{}" ({}) on {} reported'
-                   .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)))
+        state = self._state
+        if _queueReport(PlaybackCheckin.StopPlayback, state.server, data):
+            Player.log('playback stopped for "{}" ({}) on {} reported',
+                       state.item.getLabel, state.file, state.mediaProviderStr)
 
         self._reset()
 
+    def _updatePlaybackPosition(self):
+        state = self._state
+
+        # try to get the playback position from Kodi (which is only possible while playing)
+        if self.isPlaying():
+            try:
+                self._state = state._replace(lastPlaybackPosition=self.getTime())
+                return
+            except RuntimeError:
+                pass
+
+        # if that fails update it based on the time passed since the last progress report
+        if not state.paused and self._lastProgressReport:
+            Player.log('guessing the playback position for "{}" ({})',
+                       state.item.getLabel, state.file, level=xbmc.LOGDEBUG)
+            self._state = state._replace(
+                lastPlaybackPosition=state.lastPlaybackPosition + time.monotonic() - self._lastProgressReport)
+
     def _preparePlayingData(self, stopped=False, event=None, failed=False):
-        try:
-            # try to get the playback position from Kodi
-            self._lastPlaybackPosition = self.getTime()
-        except RuntimeError:
-            # if that fails update it based on the time passed since the last progress report
-            if not self._paused and self._lastProgressReport:
-                Player.log('guessing the playback position for "{}" ({})'
-                           .format(self._item.getLabel(), self._file), xbmc.LOGDEBUG)
-                self._lastPlaybackPosition += time.time() - self._lastProgressReport
+        self._updatePlaybackPosition()
+        state = self._state
 
         data = {
-            'ItemId': self._itemId,
-            'PlaySessionId': self._playSessionId,
+            'ItemId': state.itemId,
+            'PlaySessionId': state.playSessionId,
             'PlaylistIndex': 0,
             'PlaylistLength': 1,
-            'PositionTicks': kodi.Api.secondsToTicks(self._lastPlaybackPosition),
+            # inlined kodi.Api.secondsToTicks()
+            'PositionTicks': int((state.lastPlaybackPosition or 0) * kodi.Api.TICK_TO_SECONDS_FACTOR),
         }
 
         if stopped:
-            data.update({
-                'Failed': failed
-            })
+            data['Failed'] = failed
         else:
-            data.update({
-                'QueueableMediaTypes': 'Audio,Video',
-                'CanSeek': True,
-                'PlayMethod': self._playMethod,
-                'IsPaused': self._paused,
-            })
+            data['QueueableMediaTypes'] = 'Audio,Video'
+            data['CanSeek'] = True
+            data['PlayMethod'] = state.playMethod
+            data['IsPaused'] = state.paused
 
-            try:
-                data.update({
-                    'RunTimeTicks': kodi.Api.secondsToTicks(self.getTotalTime()),
-                })
-            except RuntimeError:
-                pass
+            if state.runTimeTicks is not None:
+                data['RunTimeTicks'] = state.runTimeTicks
 
             if event:
-                data.update({
-                    'EventName': event
-                })
+                data['EventName'] = event
 
         return data
 
-    def _addExternalSubtitles(self):
-        if not self._item:
+    # runs on a separate thread and therefore only works on the passed (immutable) playback state and server
+    def _addExternalSubtitles(self, state, server):
+        if not state.item:
             return
 
         # get the item's details to look for external subtitles
-        itemObj = Library.GetItem(self._server, self._itemId)
+        itemObj = Library.GetItem(server, state.itemId, timeout=EXTERNAL_SUBTITLES_REQUEST_TIMEOUT)
         if not itemObj:
-            Player.log('cannot retrieve details of "{}" ({}) from media provider {}'
-                       .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)),
-                       xbmc.LOGWARNING)
+            Player.log('cannot retrieve details of "{}" ({}) from media provider {}',
+                       state.item.getLabel, state.file, state.mediaProviderStr, level=xbmc.LOGWARNING)
             return
 
         # extract the media source ID
         if constants.PROPERTY_ITEM_MEDIA_SOURCES not in itemObj or not itemObj[constants.PROPERTY_ITEM_MEDIA_SOURCES]:
             Player.log('cannot add external subtitles for "{}" ({}) from media provider {} '
-                       'because it doesn\'t have a media source'
-                       .format(self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)),
-                       xbmc.LOGDEBUG)
+                       'because it doesn\'t have a media source',
+                       state.item.getLabel, state.file, state.mediaProviderStr, level=xbmc.LOGDEBUG)
             return
 
         mediaSourceId = \
             itemObj.get(constants.PROPERTY_ITEM_MEDIA_SOURCES)[0].get(constants.PROPERTY_ITEM_MEDIA_SOURCES_ID)
 
+        # avoid looking up the stream properties for every stream
+        streamTypeKey = constants.PROPERTY_ITEM_MEDIA_STREAM_TYPE
+        streamIsExternalKey = constants.PROPERTY_ITEM_MEDIA_STREAM_IS_EXTERNAL
+        streamIndexKey = constants.PROPERTY_ITEM_MEDIA_STREAM_INDEX
+        streamDisplayTitleKey = constants.PROPERTY_ITEM_MEDIA_STREAM_DISPLAY_TITLE
+        streamLanguageKey = constants.PROPERTY_ITEM_MEDIA_STREAM_LANGUAGE
+        streamDeliveryUrlKey = constants.PROPERTY_ITEM_MEDIA_STREAM_DELIVERY_URL
+        streamCodecKey = constants.PROPERTY_ITEM_MEDIA_STREAM_CODEC
+
         # look for external subtitles
         for stream in itemObj.get(constants.PROPERTY_ITEM_MEDIA_STREAMS):
-            if stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_TYPE) != 'Subtitle' or \
-               not stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_IS_EXTERNAL):
+            if stream.get(streamTypeKey) != 'Subtitle' or not stream.get(streamIsExternalKey):
                 continue
 
             # get the index of the subtitle
-            index = stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_INDEX)
+            index = stream.get(streamIndexKey)
 
             # determine the language and name
-            name = stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_DISPLAY_TITLE) \
-                if constants.PROPERTY_ITEM_MEDIA_STREAM_DISPLAY_TITLE in stream else ''
-            language = stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_LANGUAGE) \
-                if constants.PROPERTY_ITEM_MEDIA_STREAM_LANGUAGE in stream else ''
+            name = stream.get(streamDisplayTitleKey, '')
+            language = stream.get(streamLanguageKey, '')
 
             # determine the stream URL
-            videoUrlPrefix = '/{}'.format(constants.URL_VIDEOS)
-            if constants.PROPERTY_ITEM_MEDIA_STREAM_DELIVERY_URL in stream and \
-               stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_DELIVERY_URL).upper().startswith(videoUrlPrefix):
-                url = self._server.BuildStreamDeliveryUrl(
-                    stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_DELIVERY_URL))
+            deliveryUrl = stream.get(streamDeliveryUrlKey)
+            if deliveryUrl and deliveryUrl.upper().startswith(_VIDEO_URL_PREFIX):
+                url = server.BuildStreamDeliveryUrl(deliveryUrl)
             else:
-                url = self._server.BuildSubtitleStreamUrl(self._itemId, mediaSourceId, index,
-                                                          stream.get(constants.PROPERTY_ITEM_MEDIA_STREAM_CODEC))
+                url = server.BuildSubtitleStreamUrl(state.itemId, mediaSourceId, index, stream.get(streamCodecKey))
 
             if not url:
-                Player.log('cannot add external subtitle at index {} for "{}" ({}) from media provider {}'
-                           .format(index, self._item.getLabel(), self._file, mediaProvider2str(self._mediaProvider)),
-                           xbmc.LOGWARNING)
+                Player.log('cannot add external subtitle at index {} for "{}" ({}) from media provider {}',
+                           index, state.item.getLabel, state.file, state.mediaProviderStr, level=xbmc.LOGWARNING)
                 continue
 
+            # make sure the item is still being played
+            if state.externalSubtitlesCancelled.is_set():
+                return
+
             self.addSubtitle(url, name, language, False)
-            Player.log('external subtitle "{}" [{}] at index {} added for "{}" ({}) from media provider {}'
-                       .format(name, language, index, self._item.getLabel(), self._file,
-                               mediaProvider2str(self._mediaProvider)))
+            Player.log('external subtitle "{}" [{}] at index {} added for "{}" ({}) from media provider {}',
+                       name, language, index, state.item.getLabel, state.file, state.mediaProviderStr)
 
     @staticmethod
-    def log(message, level=xbmc.LOGINFO):
+    def log(message, *args, level=xbmc.LOGINFO):
+        # don't bother formatting messages which won't end up in the log anyway
+        if level < Player._minLogLevel:
+            return
+
+        if args:
+            # callable arguments are only evaluated when the message is actually logged
+            message = message.format(*(arg() if callable(arg) else arg for arg in args))
+
         log('[player] {}'.format(message), level)
+
+    @staticmethod
+    def _updateMinLogLevel():
+        if xbmc.getCondVisibility('System.GetBool(debug.showloginfo)'):
+            Player._minLogLevel = xbmc.LOGDEBUG
+        else:
+            Player._minLogLevel = xbmc.LOGINFO
@@ -9,6 +9,7 @@
 import uuid
 
 import requests
+from requests.adapters import HTTPAdapter
 
 import xbmc  # pylint: disable=import-error
 
@@ -60,63 +61,77 @@ class Request:
         return headers
 
     @staticmethod
-    def Get(url, headers=None, timeout=None):
-        result = Request._get(url, headers=headers, timeout=timeout)
+    def Get(url, headers=None, timeout=None, session=None):
+        result = Request._get(url, headers=headers, timeout=timeout, session=session)
         return Request._handleRequestAsContent(result, 'GET')
 
     @staticmethod
-    def GetAsJson(url, headers=None, timeout=None):
-        result = Request._get(url, headers=headers, timeout=timeout)
+    def GetAsJson(url, headers=None, timeout=None, session=None):
+        result = Request._get(url, headers=headers, timeout=timeout, session=session)
         return Request._handleRequestAsJson(result, 'GET')
 
     @staticmethod
-    def Post(url, headers=None, body=None, json=None, timeout=None):
-        result = Request._post(url, headers=headers, body=body, json=json, timeout=timeout)
+    # pylint: disable=too-many-arguments
+    def Post(url, headers=None, body=None, json=None, timeout=None, session=None):
+        result = Request._post(url, headers=headers, body=body, json=json, timeout=timeout, session=session)
         return Request._handleRequestAsContent(result, 'POST')
 
     @staticmethod
-    def PostAsJson(url, headers=None, body=None, json=None, timeout=None):
-        result = Request._post(url, headers=headers, body=body, json=json, timeout=timeout)
+    # pylint: disable=too-many-arguments
+    def PostAsJson(url, headers=None, body=None, json=None, timeout=None, session=None):
+        result = Request._post(url, headers=headers, body=body, json=json, timeout=timeout, session=session)
         return Request._handleRequestAsJson(result, 'POST')
 
     @staticmethod
-    def Delete(url, headers=None, timeout=None):
-        result = Request._delete(url, headers=headers, timeout=timeout)
+    def Delete(url, headers=None, timeout=None, session=None):
+        result = Request._delete(url, headers=headers, timeout=timeout, session=session)
         return Request._handleRequestAsContent(result, 'DELETE')
 
     @staticmethod
-    def DeleteAsJson(url, headers=None, timeout=None):
-        result = Request._delete(url, headers=headers, timeout=timeout)
+    def DeleteAsJson(url, headers=None, timeout=None, session=None):
+        result = Request._delete(url, headers=headers, timeout=timeout, session=session)
         return Request._handleRequestAsJson(result, 'DELETE')
 
     @staticmethod
-    def _get(url, headers=None, timeout=None):
+    def CreateSession():
+        # keep a small pool of persistent connections to the same server
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, pool_block=True)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        return session
+
+    @staticmethod
+    def _get(url, headers=None, timeout=None, session=None):
         Request._logRequest('GET', url, headers)
         try:
-            return requests.get(url, headers=headers, timeout=timeout, verify=False)  # nosec
+            return (session or requests).get(url, headers=headers, timeout=timeout, verify=False)  # nosec
         except requests.exceptions.RequestException as err:
             log('error retrieving response from GET {}: {}'.format(url, err), xbmc.LOGERROR)
 
         return None
 
     @staticmethod
-    def _post(url, headers=None, body=None, json=None, timeout=None):
+    # pylint: disable=too-many-arguments
+    def _post(url, headers=None, body=None, json=None, timeout=None, session=None):
         if body and json:
             raise ValueError('body and json can\'t be combined')
 
         Request._logRequest('POST', url, headers, body or json)
         try:
-            return requests.post(url, headers=headers, timeout=timeout, data=body, json=json, verify=False)  # nosec
+            return (session or requests).post(url, headers=headers, timeout=timeout, data=body, json=json,
+                                              verify=False)  # nosec
         except requests.exceptions.RequestException as err:
             log('error retrieving response from POST {}: {}'.format(url, err), xbmc.LOGERROR)
 
         return None
 
     @staticmethod
-    def _delete(url, headers=None, timeout=None):
+    def _delete(url, headers=None, timeout=None, session=None):
         Request._logRequest('DELETE', url, headers)
         try:
-            return requests.delete(url, headers=headers, timeout=timeout, verify=False)  # nosec
+            return (session or requests).delete(url, headers=headers, timeout=timeout, verify=False)  # nosec
         except requests.exceptions.RequestException as err:
             log('error retrieving response from DELETE {}: {}'.format(url, err), xbmc.LOGERROR)
 
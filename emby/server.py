@@ -30,6 +30,7 @@ class Server:
             raise ValueError('Invalid provider without settings')
 
         self._devideId = self._settings.getString(constants.SETTING_PROVIDER_DEVICEID)
+        self._session = None
 
         token = self._settings.getString(constants.SETTING_PROVIDER_TOKEN)
         authMethod = self._settings.getString(constants.SETTING_PROVIDER_AUTHENTICATION)
@@ -70,16 +71,29 @@ class Server:
     def UserId(self):
         return self._authenticator.UserId()
 
-    def ApiGet(self, url):
-        return self._request(url, lambda url, headers: Request.GetAsJson(url, headers=headers))
+    def EnsureSession(self):
+        if not self._session:
+            self._session = Request.CreateSession()
 
-    def ApiPost(self, url, data=None, json=None):
+    def CloseSession(self):
+        if not self._session:
+            return
+
+        self._session.close()
+        self._session = None
+
+    def ApiGet(self, url, timeout=None):
+        return self._request(url, lambda url, headers: Request.GetAsJson(url, headers=headers, timeout=timeout,
+                                                                         session=self._session))
+
+    def ApiPost(self, url, data=None, json=None, timeout=None):
         return self._request(url, lambda url, headers, data, json:
-                             Request.PostAsJson(url, headers=headers, body=data, json=json),
+                             Request.PostAsJson(url, headers=headers, body=data, json=json, timeout=timeout,
+                                                session=self._session),
                              data, json)
 
     def ApiDelete(self, url):
-        return self._request(url, lambda url, headers: Request.Delete(url, headers=headers))
+        return self._request(url, lambda url, headers: Request.Delete(url, headers=headers, session=self._session))
 
     def BuildUrl(self, endpoint):
         if not endpoint:
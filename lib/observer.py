@@ -43,6 +43,9 @@ class EmbyObserverService(xbmcmediaimport.Observer):
         for observer in self._observers.values():
             observer.Stop()
 
+        # stop the player (and send any pending playback reports)
+        self._player.Stop()
+
     def _addObserver(self, mediaProvider):
         if not mediaProvider:
             raise ValueError('cannot add invalid media provider')